@@ -13,6 +13,7 @@ Features:
 import streamlit as st
 import pandas as pd
 import numpy as np
+import sklearn
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import Pipeline
@@ -20,13 +21,149 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import requests
 import folium
-from geopy.geocoders import Nominatim
-from geopy.distance import geodesic
-from location_service import LocationService
+import jinja2
+from markupsafe import escape
+from location_service import get_location_service
+from config import MODEL_CACHE_DIR
+from functools import lru_cache
+import hashlib
+import joblib
+import os
 import re
+from urllib.parse import quote_plus
 import warnings
 warnings.filterwarnings('ignore')
 
+@st.cache_resource
+def _compile_template(source):
+    """Compile an autoescaped Jinja template once per process (Streamlit re-runs this script on every interaction)"""
+    return jinja2.Environment(autoescape=True).from_string(source)
+
+# Map popup for a medical facility, compiled once and autoescaped
+_POPUP_TEMPLATE = _compile_template("""
+<div style="width: 280px; font-family: Arial, sans-serif;">
+    <h4 style="color: #2E86AB; margin-bottom: 10px;">{{ doctor.name }}</h4>
+    <p><strong>🏥 Type:</strong> {{ doctor.get('type', 'Medical Facility') }}</p>
+    <p><strong>📍 Address:</strong> {{ doctor.get('address', 'Not available') }}</p>
+    <p><strong>📏 Distance:</strong> {{ doctor.get('distance', 'N/A') }} km</p>
+    <p><strong>⭐ Rating:</strong> {{ doctor.get('rating', 'N/A') }}/5.0</p>
+    {% if doctor.get('phone') and doctor.phone != 'Not available' %}
+    <p><strong>📞 Phone:</strong> <a href="tel:{{ doctor.phone }}">{{ doctor.phone }}</a></p>
+    {% endif %}
+    {% if doctor.get('website') %}
+    <p><strong>🌐 Website:</strong> <a href="{{ doctor.website }}" target="_blank">Visit Website</a></p>
+    {% endif %}
+    {% if doctor.get('hours') %}
+    <p><strong>🕒 Hours:</strong> {{ doctor.hours }}</p>
+    {% endif %}
+    {% if doctor.get('specialties') %}
+    <p><strong>🩺 Specialties:</strong><br>{% for spec in doctor.specialties %}• {{ spec }}{% if not loop.last %}<br>{% endif %}{% endfor %}</p>
+    {% endif %}
+    <div style="margin-top: 15px; text-align: center;">
+        <a href="{{ directions_url }}" target="_blank" style="background-color: #4285f4; color: white; padding: 8px 16px; text-decoration: none; border-radius: 4px; font-weight: bold;">🗺️ Get Directions</a>
+    </div>
+</div>
+""")
+
+# Summary row of a facility card in the doctor finder, autoescaped
+_CARD_TEMPLATE = _compile_template("""
+<div class="feature-card">
+    <div style="display: flex; gap: 1rem; align-items: center;">
+        <div style="flex: 3;"><strong>{{ name }}</strong><br>📍 {{ address }}</div>
+        <div style="flex: 2;">🏥 {{ type }}<br>{% if rating > 0 %}⭐ {{ rating }}/5.0{% else %}⭐ Rating not available{% endif %}</div>
+        <div style="flex: 1;">📏 {{ distance }} km</div>
+        <div style="flex: 1;"><a href="{{ directions_url }}" target="_blank"><button style="background-color: #4285f4; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 12px; width: 100%;">🗺️ Go</button></a></div>
+    </div>
+</div>
+""")
+
+# Map marker color for each (lowercased) facility type; other types are blue
+_FACILITY_ICON_COLORS = {
+    'hospital': 'red',
+    'clinic': 'green',
+    'family medicine': 'green',
+    'emergency': 'orange',
+    'urgent care': 'orange'
+}
+
+# Advice shown for diseases without specific precautions
+_GENERIC_PRECAUTIONS = (
+    "Consult with a healthcare professional for proper diagnosis",
+    "Rest and stay hydrated",
+    "Monitor your symptoms closely",
+    "Seek immediate medical attention if symptoms worsen"
+)
+
+# Part of the model cache key; bump it when symptom cleaning or the training pipeline changes
+_MODEL_VERSION = 1
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_UNDERSCORE_TO_SPACE = str.maketrans('_', ' ')
+
+def _clean_symptom(symptom):
+    """Normalize a raw symptom name: underscores become spaces and whitespace is collapsed"""
+    return _WHITESPACE_RE.sub(' ', symptom.translate(_UNDERSCORE_TO_SPACE)).strip()
+
+def get_directions_url(doctor):
+    """Google Maps directions URL for a facility, by coordinates, address or name"""
+    if doctor.get('lat') is not None and doctor.get('lon') is not None:
+        return f"https://www.google.com/maps/dir/?api=1&destination={doctor['lat']},{doctor['lon']}"
+    if doctor.get('address'):
+        return f"https://www.google.com/maps/dir/?api=1&destination={quote_plus(doctor['address'])}"
+    return f"https://www.google.com/maps/search/{quote_plus(doctor['name'])}"
+
+class DiseaseScorer:
+    """Naive Bayes scorer using tables precomputed from a fitted TF-IDF + MultinomialNB pipeline"""
+    
+    def __init__(self, model):
+        tfidf = model.named_steps['tfidf']
+        classifier = model.named_steps['classifier']
+        self.vocabulary = tfidf.vocabulary_
+        self.idf = tfidf.idf_
+        self.weights = classifier.feature_log_prob_
+        self.bias = classifier.class_log_prior_
+        self.classes = model.classes_
+        
+        # Memoize per scorer: module-level caches are rebuilt each time Streamlit re-runs this script
+        self.top_diseases = lru_cache(maxsize=1024)(self.top_diseases)
+    
+    def predict_proba(self, symptom_tokens):
+        """Class probabilities for already-analyzed symptom tokens"""
+        # Nonzero TF-IDF entries with L2 normalization, as TfidfVectorizer.transform
+        ids = np.fromiter(
+            (self.vocabulary[token] for token in symptom_tokens if token in self.vocabulary), dtype=np.intp
+        )
+        ids, counts = np.unique(ids, return_counts=True)
+        x = counts * self.idf[ids]
+        norm = np.sqrt(x @ x)
+        if norm > 0:
+            x /= norm
+        
+        # Naive Bayes joint log likelihood over the query's columns only, then a softmax over all classes
+        scores = self.weights[:, ids] @ x + self.bias
+        probabilities = np.exp(scores - scores.max())
+        return probabilities / probabilities.sum()
+    
+    def top_diseases(self, symptom_tokens):
+        """Run model inference for a canonical tuple of symptom tokens (memoized)"""
+        # Get prediction probabilities
+        probabilities = self.predict_proba(symptom_tokens)
+        
+        # Get top 5 predictions without sorting every class
+        k = min(5, len(probabilities))
+        top_indices = np.argpartition(-probabilities, k - 1)[:k]
+        top_indices = top_indices[np.argsort(-probabilities[top_indices], kind='stable')]
+        
+        predictions = []
+        confidences = []
+        
+        for idx in top_indices:
+            if probabilities[idx] > 0.01:  # Only show predictions with >1% confidence
+                predictions.append(self.classes[idx])
+                confidences.append(probabilities[idx] * 100)
+        
+        return tuple(predictions), tuple(confidences)
+
 class HealthcareAssistant:
     def __init__(self):
         """Initialize the Healthcare Assistant with data and models"""
@@ -34,65 +171,95 @@ class HealthcareAssistant:
         self.precautions_df = None
         self.model = None
         self.vectorizer = None
+        self._analyzer = None
+        self._scorer = None
         self.symptoms_list = []
         self.diseases_list = []
-        self.location_service = LocationService()
+        self.symptom_columns = []
+        self.disease_to_symptoms = {}
+        self.disease_to_precautions = {}
+        self._precaution_index = {}
+        self._clean_symptoms = {}
+        self.location_service = get_location_service()
+        # Start-up notices as (level, message) pairs, shown by main() once per session
+        self.status_messages = list(self.location_service.status_messages)
         self.load_data()
         self.prepare_model()
     
     def load_data(self):
-        """Load disease and symptoms data from CSV files"""
-        try:
-            # Load diseases and symptoms data
-            self.diseases_df = pd.read_csv('DiseaseAndSymptoms.csv')
-            self.precautions_df = pd.read_csv('Disease precaution.csv')
-            
-            # Clean and process data
-            self.clean_data()
-            
-            st.success("✅ Medical databases loaded successfully!")
-            
-        except FileNotFoundError as e:
-            st.error(f"❌ Error loading data files: {e}")
-            st.info("Please ensure 'DiseaseAndSymptoms.csv' and 'Disease precaution.csv' are in the same directory")
+        """Load disease and symptoms data from CSV files (raises FileNotFoundError if one is missing)"""
+        # Load diseases and symptoms data
+        self.diseases_df = pd.read_csv('DiseaseAndSymptoms.csv', engine='pyarrow', dtype_backend='pyarrow')
+        self.precautions_df = pd.read_csv('Disease precaution.csv', engine='pyarrow', dtype_backend='pyarrow')
+        
+        # Clean and process data
+        self.clean_data()
+        
+        self.status_messages.append(('success', "✅ Medical databases loaded successfully!"))
     
     def clean_data(self):
         """Clean and preprocess the medical data"""
+        # Store disease names as categoricals (in order of first appearance) for compact storage;
+        # blank disease cells become missing values with code -1
+        for df in (self.diseases_df, self.precautions_df):
+            df['Disease'] = pd.Categorical(df['Disease'], categories=pd.unique(df['Disease'].dropna()))
+        
         # Get unique diseases
-        self.diseases_list = self.diseases_df['Disease'].unique().tolist()
+        self.diseases_list = self.diseases_df['Disease'].cat.categories.tolist()
         
-        # Extract all unique symptoms
-        symptom_columns = [col for col in self.diseases_df.columns if col.startswith('Symptom_')]
-        all_symptoms = set()
+        # Clean each distinct symptom cell once
+        self.symptom_columns = [col for col in self.diseases_df.columns if col.startswith('Symptom_')]
+        symptom_cells = self.diseases_df[self.symptom_columns].to_numpy().ravel()
+        self._clean_symptoms = {
+            raw: _clean_symptom(raw) for raw in pd.unique(symptom_cells) if isinstance(raw, str)
+        }
         
-        for col in symptom_columns:
-            symptoms = self.diseases_df[col].dropna().str.strip()
-            all_symptoms.update(symptoms)
+        # Extract all unique symptoms (remove empty strings)
+        self.symptoms_list = sorted({symptom for symptom in self._clean_symptoms.values() if symptom})
         
-        # Clean symptoms (remove empty strings and normalize)
-        self.symptoms_list = [s.strip().replace('_', ' ') for s in all_symptoms if s and s.strip()]
-        self.symptoms_list = sorted(list(set(self.symptoms_list)))
+        # Map each disease to the symptoms of its first record
+        first_records = self.diseases_df.dropna(subset=['Disease']).drop_duplicates('Disease')
+        self.disease_to_symptoms = {
+            disease: [symptom for symptom in map(self._clean_symptoms.get, row) if symptom]
+            for disease, row in zip(first_records['Disease'], first_records[self.symptom_columns].to_numpy())
+        }
+        
+        # Map each disease to its list of precautions
+        precaution_columns = [col for col in self.precautions_df.columns if col.startswith('Precaution_')]
+        self.disease_to_precautions = {
+            disease: [p.strip() for p in precautions if isinstance(p, str) and p.strip()]
+            for disease, *precautions in self.precautions_df[['Disease'] + precaution_columns].itertuples(index=False, name=None)
+            if isinstance(disease, str)
+        }
+        self._precaution_index = {disease.lower(): precautions for disease, precautions in self.disease_to_precautions.items()}
         
     def prepare_model(self):
         """Prepare machine learning model for disease prediction"""
         if self.diseases_df is not None:
-            # Create training data
+            # Reuse a previously fitted model if the data files haven't changed
+            cache_path = os.path.join(MODEL_CACHE_DIR, f"model_{self._data_fingerprint()}.joblib")
+            if os.path.exists(cache_path):
+                try:
+                    cached = joblib.load(cache_path)
+                    self.model = cached['model']
+                    self.vectorizer = self.model.named_steps['tfidf']
+                    self._analyzer = self.vectorizer.build_analyzer()
+                    self._scorer = DiseaseScorer(self.model)
+                    self.status_messages.append(('success', "🧠 AI model loaded from cache!"))
+                    return
+                except Exception as e:
+                    self.status_messages.append(('warning', f"Could not load cached model, retraining: {e}"))
+            
+            # Create training data: join each record's cleaned symptoms into a single document
+            documents = [
+                ' '.join(filter(None, map(self._clean_symptoms.get, row)))
+                for row in self.diseases_df[self.symptom_columns].to_numpy()
+            ]
             X_train = []
             y_train = []
-            
-            for _, row in self.diseases_df.iterrows():
-                disease = row['Disease']
-                symptoms = []
-                
-                # Collect all symptoms for this row
-                for col in self.diseases_df.columns:
-                    if col.startswith('Symptom_') and pd.notna(row[col]):
-                        symptom = row[col].strip().replace('_', ' ')
-                        if symptom:
-                            symptoms.append(symptom)
-                
-                if symptoms:
-                    X_train.append(' '.join(symptoms))
+            for document, disease in zip(documents, self.diseases_df['Disease']):
+                if document and isinstance(disease, str):
+                    X_train.append(document)
                     y_train.append(disease)
             
             # Create ML pipeline
@@ -104,30 +271,35 @@ class HealthcareAssistant:
             # Train the model
             if X_train and y_train:
                 self.model.fit(X_train, y_train)
-                st.success("🧠 AI model trained successfully!")
+                self.vectorizer = self.model.named_steps['tfidf']
+                self._analyzer = self.vectorizer.build_analyzer()
+                self._scorer = DiseaseScorer(self.model)
+                self.status_messages.append(('success', "🧠 AI model trained successfully!"))
+                
+                try:
+                    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+                    joblib.dump({'model': self.model}, cache_path, compress=3)
+                except Exception as e:
+                    self.status_messages.append(('warning', f"Could not cache trained model: {e}"))
+    
+    def _data_fingerprint(self):
+        """Hash the data files, model version and scikit-learn version to key the model cache"""
+        digest = hashlib.sha1(f"{_MODEL_VERSION}|{sklearn.__version__}".encode())
+        for path in ('DiseaseAndSymptoms.csv', 'Disease precaution.csv'):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        return digest.hexdigest()
     
     def predict_disease(self, symptoms_text):
         """Predict disease based on symptoms"""
-        if self.model is None:
+        if self._scorer is None:
             return [], []
         
         try:
-            # Get prediction probabilities
-            probabilities = self.model.predict_proba([symptoms_text])[0]
-            classes = self.model.classes_
-            
-            # Get top 5 predictions
-            top_indices = np.argsort(probabilities)[-5:][::-1]
-            
-            predictions = []
-            confidences = []
-            
-            for idx in top_indices:
-                if probabilities[idx] > 0.01:  # Only show predictions with >1% confidence
-                    predictions.append(classes[idx])
-                    confidences.append(probabilities[idx] * 100)
-            
-            return predictions, confidences
+            # The model is a bag of words, so the sorted token list fully determines the result
+            symptom_tokens = tuple(sorted(self._analyzer(symptoms_text)))
+            predictions, confidences = self._scorer.top_diseases(symptom_tokens)
+            return list(predictions), list(confidences)
             
         except Exception as e:
             st.error(f"Error in prediction: {e}")
@@ -135,39 +307,26 @@ class HealthcareAssistant:
     
     def get_precautions(self, disease):
         """Get precautions and recommendations for a disease"""
-        if self.precautions_df is not None:
-            try:
-                # First, try exact match
-                precautions = self.precautions_df[self.precautions_df['Disease'].str.lower() == disease.lower()]
-                
-                # If no exact match, try partial match
-                if precautions.empty:
-                    precautions = self.precautions_df[self.precautions_df['Disease'].str.lower().str.contains(disease.lower().split()[0], na=False)]
-                
-                if not precautions.empty:
-                    precaution_list = []
-                    for col in ['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4']:
-                        if col in precautions.columns:
-                            precaution = precautions.iloc[0][col]
-                            if pd.notna(precaution) and str(precaution).strip() and str(precaution).strip() != '':
-                                precaution_list.append(str(precaution).strip())
-                    return precaution_list
-                else:
-                    # Return generic health advice if no specific precautions found
-                    return [
-                        "Consult with a healthcare professional for proper diagnosis",
-                        "Rest and stay hydrated",
-                        "Monitor your symptoms closely",
-                        "Seek immediate medical attention if symptoms worsen"
-                    ]
-            except Exception as e:
-                st.error(f"Error getting precautions: {e}")
-        return [
-            "Consult with a healthcare professional for proper diagnosis",
-            "Rest and stay hydrated", 
-            "Monitor your symptoms closely",
-            "Seek immediate medical attention if symptoms worsen"
-        ]
+        # First, try exact match
+        precautions = self.disease_to_precautions.get(disease)
+        
+        # Then a case-insensitive match
+        if precautions is None:
+            disease_key = disease.lower()
+            precautions = self._precaution_index.get(disease_key)
+            
+            # If still no match, try partial match on the first word
+            if precautions is None and disease_key.split():
+                first_word = disease_key.split()[0]
+                match = next((name for name in self._precaution_index if first_word in name), None)
+                if match is not None:
+                    precautions = self._precaution_index[match]
+        
+        if precautions is not None:
+            return list(precautions)
+        
+        # Return generic health advice if no specific precautions found
+        return list(_GENERIC_PRECAUTIONS)
     
     def find_nearby_doctors(self, location=None, radius=10, use_current_location=False):
         """Find nearby doctors and hospitals using real location services"""
@@ -229,66 +388,49 @@ class HealthcareAssistant:
                 icon=folium.Icon(color='red', icon='user')
             ).add_to(m)
             
+            # Approximate position offsets for demo data without coordinates
+            jitter = np.random.uniform(-0.05, 0.05, size=(len(doctors), 2))
+            
             # Add doctor locations using real coordinates
             for i, doctor in enumerate(doctors):
                 # Use real coordinates if available, otherwise approximate
                 if 'lat' in doctor and 'lon' in doctor:
                     doc_lat, doc_lon = doctor['lat'], doctor['lon']
                 else:
-                    # Fallback to approximate positions for demo data
-                    lat_offset = np.random.uniform(-0.05, 0.05)
-                    lon_offset = np.random.uniform(-0.05, 0.05)
-                    doc_lat, doc_lon = lat + lat_offset, lon + lon_offset
+                    doc_lat, doc_lon = lat + jitter[i, 0], lon + jitter[i, 1]
                 
                 # Choose icon color based on facility type
-                icon_color = 'blue'
-                if doctor.get('type', '').lower() in ['hospital']:
-                    icon_color = 'red'
-                elif doctor.get('type', '').lower() in ['clinic', 'family medicine']:
-                    icon_color = 'green'
-                elif doctor.get('type', '').lower() in ['emergency', 'urgent care']:
-                    icon_color = 'orange'
+                icon_color = _FACILITY_ICON_COLORS.get(doctor.get('type', '').lower(), 'blue')
                 
                 # Create directions URL for the popup
-                if 'lat' in doctor and 'lon' in doctor:
-                    directions_url = f"https://www.google.com/maps/dir/?api=1&destination={doctor['lat']},{doctor['lon']}"
-                elif doctor.get('address'):
-                    address_encoded = doctor['address'].replace(' ', '+').replace(',', '%2C')
-                    directions_url = f"https://www.google.com/maps/dir/?api=1&destination={address_encoded}"
-                else:
-                    name_encoded = doctor['name'].replace(' ', '+')
-                    directions_url = f"https://www.google.com/maps/search/{name_encoded}"
+                directions_url = get_directions_url(doctor)
                 
-                popup_html = f"""
-                <div style="width: 280px; font-family: Arial, sans-serif;">
-                    <h4 style="color: #2E86AB; margin-bottom: 10px;">{doctor['name']}</h4>
-                    <p><strong>🏥 Type:</strong> {doctor.get('type', 'Medical Facility')}</p>
-                    <p><strong>📍 Address:</strong> {doctor.get('address', 'Not available')}</p>
-                    <p><strong>📏 Distance:</strong> {doctor.get('distance', 'N/A')} km</p>
-                    <p><strong>⭐ Rating:</strong> {doctor.get('rating', 'N/A')}/5.0</p>
-                    
-                    {f"<p><strong>📞 Phone:</strong> <a href='tel:{doctor['phone']}'>{doctor['phone']}</a></p>" if doctor.get('phone') and doctor['phone'] != 'Not available' else ""}
-                    {f"<p><strong>🌐 Website:</strong> <a href='{doctor['website']}' target='_blank'>Visit Website</a></p>" if doctor.get('website') else ""}
-                    {f"<p><strong>🕒 Hours:</strong> {doctor['hours']}</p>" if doctor.get('hours') else ""}
-                    
-                    {f"<p><strong>🩺 Specialties:</strong><br>{'<br>'.join(['• ' + spec for spec in doctor['specialties']])}</p>" if doctor.get('specialties') else ""}
-                    
-                    <div style="margin-top: 15px; text-align: center;">
-                        <a href="{directions_url}" target="_blank" style="background-color: #4285f4; color: white; padding: 8px 16px; text-decoration: none; border-radius: 4px; font-weight: bold;">🗺️ Get Directions</a>
-                    </div>
-                </div>
-                """
+                popup_html = _POPUP_TEMPLATE.render(doctor=doctor, directions_url=directions_url)
                 
                 folium.Marker(
                     [doc_lat, doc_lon],
                     popup=folium.Popup(popup_html, max_width=300),
-                    tooltip=f"{doctor['name']} - {doctor.get('distance', 'N/A')} km",
+                    tooltip=escape(f"{doctor['name']} - {doctor.get('distance', 'N/A')} km"),
                     icon=folium.Icon(color=icon_color, icon='plus-sign')
                 ).add_to(m)
             
             return m
         return None
 
+@st.cache_resource
+def get_healthcare_assistant():
+    """Create a single Healthcare Assistant shared by all Streamlit sessions (failed loads are not cached)"""
+    return HealthcareAssistant()
+
+@st.cache_data(show_spinner=False)
+def get_top_symptoms(_assistant, n=15):
+    """Count symptom occurrences across all records and return the n most common"""
+    # Reuse the cleaned names from clean_data so labels match symptoms_list
+    cells = _assistant.diseases_df[_assistant.symptom_columns].stack().dropna()
+    symptoms = cells.map(_assistant._clean_symptoms)
+    symptoms = symptoms[symptoms != '']
+    return symptoms.value_counts().head(n).rename_axis('Symptom').reset_index(name='Frequency')
+
 # Streamlit Web Application
 def main():
     # Page configuration
@@ -342,11 +484,19 @@ def main():
     </style>
     """, unsafe_allow_html=True)
     
-    # Initialize the healthcare assistant
-    if 'healthcare_assistant' not in st.session_state:
-        st.session_state.healthcare_assistant = HealthcareAssistant()
+    # Initialize the healthcare assistant (shared across all sessions)
+    try:
+        assistant = get_healthcare_assistant()
+    except FileNotFoundError as e:
+        st.error(f"❌ Error loading data files: {e}")
+        st.info("Please ensure 'DiseaseAndSymptoms.csv' and 'Disease precaution.csv' are in the same directory")
+        st.stop()
     
-    assistant = st.session_state.healthcare_assistant
+    # Show start-up notices on the first run of each session only
+    if 'startup_status_shown' not in st.session_state:
+        st.session_state.startup_status_shown = True
+        for level, message in assistant.status_messages:
+            getattr(st, level)(message)
     
     # Main header
     st.markdown('<h1 class="main-header">🏥 Intelligent Healthcare Assistant</h1>', unsafe_allow_html=True)
@@ -498,16 +648,9 @@ def disease_info_page(assistant):
                 st.warning("No specific precautions found for this disease in our database.")
             
             # Show related symptoms
-            disease_symptoms = assistant.diseases_df[assistant.diseases_df['Disease'] == selected_disease]
-            if not disease_symptoms.empty:
+            symptoms = assistant.disease_to_symptoms.get(selected_disease, [])
+            if symptoms:
                 st.markdown("#### 🎯 Common Symptoms:")
-                symptom_cols = [col for col in disease_symptoms.columns if col.startswith('Symptom_')]
-                symptoms = []
-                for col in symptom_cols:
-                    symptom = disease_symptoms.iloc[0][col]
-                    if pd.notna(symptom) and symptom.strip():
-                        symptoms.append(symptom.strip().replace('_', ' '))
-                
                 for symptom in symptoms[:10]:  # Show first 10 symptoms
                     st.markdown(f'<span class="symptom-chip">{symptom}</span>', unsafe_allow_html=True)
         
@@ -581,47 +724,25 @@ def doctor_finder_page(assistant):
                 # Display results
                 st.markdown("### 🏥 Nearby Medical Facilities:")
                 for i, doctor in enumerate(doctors):
-                    st.markdown(f'<div class="feature-card">', unsafe_allow_html=True)
-                    
-                    # Main info row
-                    col_name, col_type, col_dist, col_action = st.columns([3, 2, 1, 1])
-                    
-                    with col_name:
-                        st.markdown(f"**{doctor['name']}**")
-                        st.markdown(f"📍 {doctor['address']}")
-                    
-                    with col_type:
-                        st.markdown(f"🏥 {doctor['type']}")
-                        if doctor.get('rating', 0) > 0:
-                            st.markdown(f"⭐ {doctor['rating']}/5.0")
-                        else:
-                            st.markdown("⭐ Rating not available")
-                    
-                    with col_dist:
-                        st.markdown(f"📏 {doctor['distance']} km")
-                    
-                    with col_action:
-                        # Quick directions button
-                        if doctor.get('lat') and doctor.get('lon'):
-                            directions_url = f"https://www.google.com/maps/dir/?api=1&destination={doctor['lat']},{doctor['lon']}"
-                        elif doctor.get('address'):
-                            address_encoded = doctor['address'].replace(' ', '+').replace(',', '%2C')
-                            directions_url = f"https://www.google.com/maps/dir/?api=1&destination={address_encoded}"
-                        else:
-                            name_encoded = doctor['name'].replace(' ', '+')
-                            directions_url = f"https://www.google.com/maps/search/{name_encoded}"
-                        
-                        st.markdown(f'<a href="{directions_url}" target="_blank"><button style="background-color: #4285f4; color: white; border: none; padding: 6px 12px; border-radius: 4px; cursor: pointer; font-size: 12px; width: 100%;">🗺️ Go</button></a>', unsafe_allow_html=True)
+                    # Main info row (name, type, rating, distance and a quick directions button)
+                    directions_url = get_directions_url(doctor)
+                    card_html = _CARD_TEMPLATE.render(
+                        name=doctor['name'], type=doctor['type'], address=doctor['address'],
+                        rating=doctor.get('rating', 0), distance=doctor['distance'],
+                        directions_url=directions_url
+                    )
+                    st.markdown(card_html, unsafe_allow_html=True)
                     
                     # Expandable details section
                     with st.expander(f"📞 Contact Info & Details - {doctor['name']}"):
                         contact_col1, contact_col2 = st.columns(2)
                         
                         with contact_col1:
-                            st.markdown("**📞 Contact Information:**")
-                            if doctor.get('phone') and doctor['phone'] != 'Not available':
-                                st.markdown(f"**Phone:** {doctor['phone']}")
-                                
+                            has_phone = doctor.get('phone') and doctor['phone'] != 'Not available'
+                            phone = doctor['phone'] if has_phone else 'Not available'
+                            st.markdown(f"**📞 Contact Information:**  \n**Phone:** {phone}")
+                            
+                            if has_phone:
                                 # Phone call buttons
                                 call_col1, call_col2 = st.columns(2)
                                 with call_col1:
@@ -630,55 +751,33 @@ def doctor_finder_page(assistant):
                                         st.info("💡 Click the phone number to call on mobile devices.")
                                 
                                 with call_col2:
-                                    # Create Google Maps directions link
-                                    if doctor.get('lat') and doctor.get('lon'):
-                                        maps_url = f"https://www.google.com/maps/dir/?api=1&destination={doctor['lat']},{doctor['lon']}"
-                                    elif doctor.get('address'):
-                                        # Use address for directions if coordinates not available
-                                        address_encoded = doctor['address'].replace(' ', '+').replace(',', '%2C')
-                                        maps_url = f"https://www.google.com/maps/dir/?api=1&destination={address_encoded}"
-                                    else:
-                                        # Use hospital name as fallback
-                                        name_encoded = doctor['name'].replace(' ', '+')
-                                        maps_url = f"https://www.google.com/maps/search/{name_encoded}"
-                                    
-                                    st.markdown(f'<a href="{maps_url}" target="_blank"><button style="background-color: #4285f4; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer; font-size: 14px;">🗺️ Get Directions</button></a>', unsafe_allow_html=True)
+                                    # Google Maps directions link
+                                    st.markdown(f'<a href="{directions_url}" target="_blank"><button style="background-color: #4285f4; color: white; border: none; padding: 8px 16px; border-radius: 4px; cursor: pointer; font-size: 14px;">🗺️ Get Directions</button></a>', unsafe_allow_html=True)
+                            
+                            # Website and additional navigation options, written as one block
+                            nav_links = [f"[🔍 Search on Maps]({doctor['maps_search_url']})"]
+                            if doctor.get('address_search_url'):
+                                nav_links.append(f"[📍 Find Address]({doctor['address_search_url']})")
                             else:
-                                st.markdown("**Phone:** Not available")
+                                nav_links.append("📍 Address not available")
                             
+                            contact_lines = []
                             if doctor.get('website'):
-                                st.markdown(f"**Website:** [Visit Website]({doctor['website']})")
-                                
-                            # Add additional navigation options
-                            st.markdown("**🚗 Navigation Options:**")
-                            nav_col1, nav_col2 = st.columns(2)
-                            
-                            with nav_col1:
-                                # Google Maps link with hospital name
-                                hospital_name_encoded = doctor['name'].replace(' ', '+').replace(',', '%2C')
-                                google_maps_search = f"https://www.google.com/maps/search/{hospital_name_encoded}"
-                                st.markdown(f'[🔍 Search on Maps]({google_maps_search})')
-                            
-                            with nav_col2:
-                                # Alternative - using address if available
-                                if doctor.get('address') and doctor.get('address') != 'Address not available':
-                                    address_search = doctor['address'].replace(' ', '+').replace(',', '%2C')
-                                    address_maps_url = f"https://www.google.com/maps/search/{address_search}"
-                                    st.markdown(f'[📍 Find Address]({address_maps_url})')
-                                else:
-                                    st.markdown("📍 Address not available")
+                                contact_lines.append(f"**Website:** [Visit Website]({doctor['website']})")
+                            contact_lines += ["**🚗 Navigation Options:**", " · ".join(nav_links)]
+                            st.markdown("  \n".join(contact_lines))
                         
                         with contact_col2:
+                            detail_lines = []
                             if doctor.get('hours'):
-                                st.markdown("**🕒 Hours:**")
-                                st.markdown(doctor['hours'])
+                                detail_lines += ["**🕒 Hours:**", doctor['hours']]
                             
                             if doctor.get('specialties'):
-                                st.markdown("**🩺 Specialties:**")
-                                for specialty in doctor['specialties']:
-                                    st.markdown(f"• {specialty}")
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
+                                detail_lines.append("**🩺 Specialties:**")
+                                detail_lines += [f"• {specialty}" for specialty in doctor['specialties']]
+                            
+                            if detail_lines:
+                                st.markdown("  \n".join(detail_lines))
                 
                 # Create and display map
                 if location_coords:
@@ -738,18 +837,8 @@ def health_statistics_page(assistant):
             
             # Most common symptoms
             st.markdown("### 🎯 Most Common Symptoms")
-            symptom_counts = {}
-            for col in assistant.diseases_df.columns:
-                if col.startswith('Symptom_'):
-                    symptoms = assistant.diseases_df[col].dropna()
-                    for symptom in symptoms:
-                        if symptom.strip():
-                            clean_symptom = symptom.strip().replace('_', ' ')
-                            symptom_counts[clean_symptom] = symptom_counts.get(clean_symptom, 0) + 1
-            
             # Get top 15 symptoms
-            top_symptoms = sorted(symptom_counts.items(), key=lambda x: x[1], reverse=True)[:15]
-            symptom_df = pd.DataFrame(top_symptoms, columns=['Symptom', 'Frequency'])
+            symptom_df = get_top_symptoms(assistant)
             st.bar_chart(symptom_df.set_index('Symptom'))
             
         with col2:
@@ -13,6 +13,7 @@ VERSION = "1.0.0"
 DATA_DIR = "."
 DISEASES_FILE = os.path.join(DATA_DIR, "DiseaseAndSymptoms.csv")
 PRECAUTIONS_FILE = os.path.join(DATA_DIR, "Disease precaution.csv")
+MODEL_CACHE_DIR = os.path.join(DATA_DIR, ".cache")
 
 # ML Model Settings
 MODEL_CONFIDENCE_THRESHOLD = 0.01  # Minimum confidence for predictions
@@ -24,6 +25,15 @@ DEFAULT_SEARCH_RADIUS = 10  # km
 MAX_SEARCH_RADIUS = 50  # km
 GEOCODER_USER_AGENT = "healthcare_assistant_v1.0"
 
+# Location Cache Settings
+LOCATION_CACHE_DIR = os.path.join(MODEL_CACHE_DIR, "geo")
+LOCATION_CACHE_SIZE = 64 * 1024 * 1024  # bytes
+GEOCODE_CACHE_TTL = 7 * 24 * 3600  # seconds
+HOSPITAL_CACHE_TTL = 3600  # seconds
+PLACE_DETAILS_CACHE_TTL = 24 * 3600  # seconds
+PUBLIC_IP_CACHE_TTL = 600  # seconds
+IP_LOCATION_CACHE_TTL = 24 * 3600  # seconds
+
 # Google Maps API Configuration
 GOOGLE_MAPS_API_KEY = os.getenv('GOOGLE_MAPS_API_KEY', '')
 
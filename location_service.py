@@ -4,76 +4,181 @@ Handles real-time location detection and nearby hospital finding
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
-import googlemaps
-from geopy.geocoders import Nominatim
-from typing import Optional, Tuple, List, Dict
+import numpy as np
+from typing import TYPE_CHECKING, Optional, Tuple, List, Dict
 import json
-from config import GOOGLE_MAPS_API_KEY, IPINFO_API_KEY, DEFAULT_LOCATION, FACILITY_TYPES
+import ijson
+from urllib.parse import quote_plus
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from diskcache import Cache
+from config import (
+    GOOGLE_MAPS_API_KEY, IPINFO_API_KEY, DEFAULT_LOCATION, FACILITY_TYPES,
+    LOCATION_CACHE_DIR, LOCATION_CACHE_SIZE, GEOCODE_CACHE_TTL, HOSPITAL_CACHE_TTL,
+    PLACE_DETAILS_CACHE_TTL, PUBLIC_IP_CACHE_TTL, IP_LOCATION_CACHE_TTL
+)
+
+# googlemaps and geopy are imported on first use to keep app start-up light
+if TYPE_CHECKING:
+    import googlemaps
+    from geopy.geocoders import Nominatim
+
+@st.cache_resource
+def _get_gmaps_client(key: str) -> Optional['googlemaps.Client']:
+    """Create one Google Maps client per API key for the whole app (errors are not cached)"""
+    if not key:
+        return None
+    import googlemaps
+    return googlemaps.Client(key=key)
+
+@st.cache_resource
+def _get_geocoder() -> 'Nominatim':
+    """Create one Nominatim geocoder for the whole app"""
+    from geopy.geocoders import Nominatim
+    return Nominatim(user_agent="healthcare_assistant")
 
 class LocationService:
     """Service for handling location detection and nearby facility finding"""
     
+    # OSM address tags, in display order
+    _OSM_ADDR_KEYS = ('addr:housenumber', 'addr:street', 'addr:city', 'addr:state')
+    
+    # Overpass QL query for hospitals and clinics within {r} metres of ({lat}, {lon})
+    _OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+    _OVERPASS_TMPL = (
+        '[out:json];('
+        'node["amenity"="hospital"](around:{r},{lat},{lon});'
+        'way["amenity"="hospital"](around:{r},{lat},{lon});'
+        'node["amenity"="clinic"](around:{r},{lat},{lon});'
+        'way["amenity"="clinic"](around:{r},{lat},{lon});'
+        ');out center;'
+    )
+    
     def __init__(self):
-        self.gmaps_client = None
-        if GOOGLE_MAPS_API_KEY:
-            try:
-                self.gmaps_client = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
-            except Exception as e:
-                st.warning(f"Google Maps API not available: {e}")
+        # Start-up notices as (level, message) pairs, shown by the app once per session
+        self.status_messages = []
+        try:
+            self.gmaps_client = _get_gmaps_client(GOOGLE_MAPS_API_KEY)
+        except Exception as e:
+            self.gmaps_client = None
+            self.status_messages.append(('warning', f"Google Maps API not available: {e}"))
+        self.geocoder = None  # Created on the first geocoding request
+        
+        # Shared HTTP session so repeated lookups reuse TCP/TLS connections
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=16,
+            # Retry failed connections only: a read timeout should cost a single timeout
+            max_retries=Retry(total=3, connect=3, read=0, backoff_factor=0.3)
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
         
-        self.geocoder = Nominatim(user_agent="healthcare_assistant")
+        # Worker threads for concurrent lookups; they share the session and the Google Maps client
+        self._executor = ThreadPoolExecutor(max_workers=8)
+        
+        # Persistent LRU cache for geocoding and facility searches
+        self._cache = Cache(
+            LOCATION_CACHE_DIR,
+            size_limit=LOCATION_CACHE_SIZE,
+            eviction_policy='least-recently-used'
+        )
+    
+    def _cached(self, key: str, expire: int, fetch):
+        """Return the cached result for key, calling fetch on a miss (empty results are not stored)"""
+        cache_key = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        result = self._cache.get(cache_key)
+        if result is None:
+            result = fetch()
+            if result:
+                self._cache.set(cache_key, result, expire=expire)
+        return result
     
     def get_user_location_by_ip(self) -> Optional[Dict]:
         """Get user location using IP geolocation"""
+        ip = self._cached('public-ip', PUBLIC_IP_CACHE_TTL, self._get_public_ip)
+        if ip is None:
+            return self._lookup_ip(None)
+        return self._cached(f'ip:{ip}', IP_LOCATION_CACHE_TTL, lambda: self._lookup_ip(ip))
+    
+    def _get_public_ip(self) -> Optional[str]:
+        """Get the public IP address that outgoing requests come from"""
         try:
-            # Try with ipinfo.io first (more accurate)
-            if IPINFO_API_KEY:
-                response = requests.get(f'https://ipinfo.io/json?token={IPINFO_API_KEY}', timeout=5)
-            else:
-                response = requests.get('https://ipinfo.io/json', timeout=5)
-            
+            response = self._session.get('https://api.ipify.org?format=json', timeout=5)
             if response.status_code == 200:
-                data = response.json()
-                if 'loc' in data:
-                    lat, lon = map(float, data['loc'].split(','))
-                    return {
-                        'lat': lat,
-                        'lon': lon,
-                        'city': data.get('city', 'Unknown'),
-                        'region': data.get('region', 'Unknown'),
-                        'country': data.get('country', 'Unknown')
-                    }
-        except Exception as e:
-            st.warning(f"IP geolocation failed: {e}")
+                return response.json()['ip']
+        except Exception:
+            pass
+        return None
+    
+    def _lookup_ip(self, ip: Optional[str]) -> Optional[Dict]:
+        """Geolocate an IP address (or the caller's own address when ip is None)"""
+        # Query both providers at once so a failing ipinfo.io costs no extra round trip,
+        # but still prefer ipinfo.io (more accurate) whenever it answers
+        lookups = (
+            (self._executor.submit(self._query_ipinfo, ip), "IP geolocation"),
+            (self._executor.submit(self._query_ip_api, ip), "Fallback geolocation")
+        )
+        for future, label in lookups:
+            try:
+                location = future.result()
+                if location:
+                    return location
+            except Exception as e:
+                st.warning(f"{label} failed: {e}")
         
-        # Fallback to a free service
-        try:
-            response = requests.get('https://api.ipify.org?format=json', timeout=5)
-            if response.status_code == 200:
-                ip_data = response.json()
-                ip = ip_data['ip']
-                
-                # Get location from IP
-                location_response = requests.get(f'http://ip-api.com/json/{ip}', timeout=5)
-                if location_response.status_code == 200:
-                    location_data = location_response.json()
-                    if location_data['status'] == 'success':
-                        return {
-                            'lat': location_data['lat'],
-                            'lon': location_data['lon'],
-                            'city': location_data['city'],
-                            'region': location_data['regionName'],
-                            'country': location_data['country']
-                        }
-        except Exception as e:
-            st.warning(f"Fallback geolocation failed: {e}")
+        return None
+    
+    def _query_ipinfo(self, ip: Optional[str]) -> Optional[Dict]:
+        """Geolocate an IP address with ipinfo.io (runs on a worker thread)"""
+        url = f'https://ipinfo.io/{ip}/json' if ip else 'https://ipinfo.io/json'
+        if IPINFO_API_KEY:
+            response = self._session.get(url, params={'token': IPINFO_API_KEY}, timeout=5)
+        else:
+            response = self._session.get(url, timeout=5)
         
+        if response.status_code == 200:
+            data = response.json()
+            if 'loc' in data:
+                lat, lon = map(float, data['loc'].split(','))
+                return {
+                    'lat': lat,
+                    'lon': lon,
+                    'city': data.get('city', 'Unknown'),
+                    'region': data.get('region', 'Unknown'),
+                    'country': data.get('country', 'Unknown')
+                }
+        return None
+    
+    def _query_ip_api(self, ip: Optional[str]) -> Optional[Dict]:
+        """Geolocate an IP address with the free ip-api.com service (runs on a worker thread)"""
+        location_response = self._session.get(f'http://ip-api.com/json/{ip or ""}', timeout=5)
+        if location_response.status_code == 200:
+            location_data = location_response.json()
+            if location_data['status'] == 'success':
+                return {
+                    'lat': location_data['lat'],
+                    'lon': location_data['lon'],
+                    'city': location_data['city'],
+                    'region': location_data['regionName'],
+                    'country': location_data['country']
+                }
         return None
     
     def geocode_address(self, address: str) -> Optional[Tuple[float, float]]:
         """Convert address to coordinates"""
+        query = address.strip().lower()
+        return self._cached(f"geocode|{query}", GEOCODE_CACHE_TTL, lambda: self._geocode(query))
+    
+    def _geocode(self, address: str) -> Optional[Tuple[float, float]]:
+        """Geocode an address with Nominatim"""
         try:
+            if self.geocoder is None:
+                self.geocoder = _get_geocoder()
             location = self.geocoder.geocode(address)
             if location:
                 return (location.latitude, location.longitude)
@@ -82,72 +187,94 @@ class LocationService:
         return None
     
     def find_nearby_hospitals_real(self, lat: float, lon: float, radius_km: int = 10) -> List[Dict]:
-        """Find real nearby hospitals using Google Places API"""
+        """Find real nearby hospitals, caching results per backend on a ~100 m grid"""
+        lat_q, lon_q = round(lat, 3), round(lon, 3)
+        hospitals = self._cached(
+            f"hospitals|{lat_q}|{lon_q}|{radius_km}|{bool(self.gmaps_client)}",
+            HOSPITAL_CACHE_TTL,
+            lambda: self._fetch_nearby_hospitals(lat_q, lon_q, radius_km)
+        )
+        
+        if hospitals is None:
+            hospitals = self._get_fallback_hospitals(lat, lon, radius_km)
+        self._add_search_urls(hospitals)
+        return hospitals
+    
+    def _fetch_nearby_hospitals(self, lat: float, lon: float, radius_km: int) -> Optional[List[Dict]]:
+        """Find real nearby hospitals using Google Places API, or None if the search failed"""
         hospitals = []
         
         if self.gmaps_client:
+            places = []
             try:
-                # Search for hospitals
-                places_result = self.gmaps_client.places_nearby(
-                    location=(lat, lon),
-                    radius=radius_km * 1000,  # Convert km to meters
-                    type='hospital'
-                )
-                
-                for place in places_result.get('results', []):
-                    hospital_info = self._extract_place_info(place, lat, lon)
-                    if hospital_info:
-                        hospitals.append(hospital_info)
-                
-                # Also search for clinics
-                clinics_result = self.gmaps_client.places_nearby(
-                    location=(lat, lon),
-                    radius=radius_km * 1000,
-                    type='doctor'
+                # Search for hospitals and clinics concurrently
+                searches = self._executor.map(
+                    lambda place_type: self._places_nearby(lat, lon, radius_km, place_type),
+                    ('hospital', 'doctor')
                 )
-                
-                for place in clinics_result.get('results', []):
-                    clinic_info = self._extract_place_info(place, lat, lon, facility_type='Clinic')
-                    if clinic_info:
-                        hospitals.append(clinic_info)
+                for facility_type, results in zip(('Hospital', 'Clinic'), list(searches)):
+                    places.extend((place, facility_type) for place in results)
                 
             except Exception as e:
                 st.error(f"Error accessing Google Places API: {e}")
-                return self._get_fallback_hospitals(lat, lon, radius_km)
+                return None
+            
+            # Fetch place details concurrently since the lookups are independent
+            place_ids = [place.get('place_id') for place, _ in places]
+            places_details = self._executor.map(self._get_place_details, place_ids)
+            
+            for (place, facility_type), details in zip(places, places_details):
+                hospital_info = self._extract_place_info(place, facility_type, details)
+                if hospital_info:
+                    hospitals.append(hospital_info)
         
         else:
             # Use OpenStreetMap/Nominatim as fallback
             return self._search_osm_hospitals(lat, lon, radius_km)
         
-        # Sort by distance
-        hospitals.sort(key=lambda x: x['distance'])
-        return hospitals[:15]  # Return top 15 results
+        return self._nearest_facilities(hospitals, lat, lon)  # Return top 15 results
+    
+    def _places_nearby(self, lat: float, lon: float, radius_km: int, place_type: str) -> List[Dict]:
+        """Search Google Places for one facility type (runs on a worker thread)"""
+        places_result = self.gmaps_client.places_nearby(
+            location=(lat, lon),
+            radius=radius_km * 1000,  # Convert km to meters
+            type=place_type
+        )
+        return places_result.get('results', [])
+    
+    def _get_place_details(self, place_id: Optional[str]) -> Optional[Dict]:
+        """Fetch additional place details from Google Places (runs on a worker thread)"""
+        if not place_id:
+            return None
+        return self._cached(
+            f"place|{place_id}",
+            PLACE_DETAILS_CACHE_TTL,
+            lambda: self._fetch_place_details(place_id)
+        )
     
-    def _extract_place_info(self, place: Dict, user_lat: float, user_lon: float, facility_type: str = 'Hospital') -> Optional[Dict]:
-        """Extract hospital information from Google Places result"""
+    def _fetch_place_details(self, place_id: str) -> Optional[Dict]:
+        """Fetch place details for a single place_id, or None if the lookup failed"""
+        try:
+            return self.gmaps_client.place(
+                place_id=place_id,
+                fields=['name', 'formatted_phone_number', 'website', 'opening_hours', 'rating']
+            )['result']
+        except Exception:
+            return None
+    
+    def _extract_place_info(self, place: Dict, facility_type: str = 'Hospital',
+                            details: Optional[Dict] = None) -> Optional[Dict]:
+        """Extract hospital information from Google Places result (distance is added by the caller)"""
         try:
             place_lat = place['geometry']['location']['lat']
             place_lon = place['geometry']['location']['lng']
             
-            # Calculate distance
-            distance = self._calculate_distance(user_lat, user_lon, place_lat, place_lon)
-            
-            # Get additional details
             place_id = place['place_id']
-            details = None
-            if self.gmaps_client:
-                try:
-                    details = self.gmaps_client.place(
-                        place_id=place_id,
-                        fields=['name', 'formatted_phone_number', 'website', 'opening_hours', 'rating']
-                    )['result']
-                except:
-                    pass
             
             hospital_info = {
                 'name': place.get('name', 'Unknown Hospital'),
                 'type': facility_type,
-                'distance': round(distance, 1),
                 'rating': place.get('rating', 0) or (details.get('rating', 0) if details else 0),
                 'address': place.get('vicinity', 'Address not available'),
                 'lat': place_lat,
@@ -175,93 +302,93 @@ class LocationService:
             st.warning(f"Error processing place data: {e}")
             return None
     
-    def _search_osm_hospitals(self, lat: float, lon: float, radius_km: int) -> List[Dict]:
-        """Search for hospitals using OpenStreetMap (Overpass API)"""
+    def _search_osm_hospitals(self, lat: float, lon: float, radius_km: int) -> Optional[List[Dict]]:
+        """Search for hospitals using OpenStreetMap (Overpass API), or None if the search failed"""
         hospitals = []
         
         try:
             # Overpass API query for hospitals
-            overpass_url = "https://overpass-api.de/api/interpreter"
-            overpass_query = f"""
-            [out:json];
-            (
-              node["amenity"="hospital"](around:{radius_km * 1000},{lat},{lon});
-              way["amenity"="hospital"](around:{radius_km * 1000},{lat},{lon});
-              node["amenity"="clinic"](around:{radius_km * 1000},{lat},{lon});
-              way["amenity"="clinic"](around:{radius_km * 1000},{lat},{lon});
-            );
-            out center;
-            """
+            overpass_query = self._OVERPASS_TMPL.format(r=radius_km * 1000, lat=lat, lon=lon)
             
-            response = requests.post(overpass_url, data=overpass_query, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            with self._session.post(self._OVERPASS_URL, data=overpass_query, timeout=10, stream=True) as response:
+                if response.status_code == 200:
+                    # Stream elements out of the (possibly large) response instead of loading it whole
+                    response.raw.decode_content = True
+                    elements = ijson.items(response.raw, 'elements.item', use_float=True)
                 
-                for element in data.get('elements', []):
-                    if 'tags' in element:
-                        tags = element['tags']
-                        
-                        # Get coordinates
-                        if element['type'] == 'node':
-                            elem_lat, elem_lon = element['lat'], element['lon']
-                        elif 'center' in element:
-                            elem_lat, elem_lon = element['center']['lat'], element['center']['lon']
-                        else:
-                            continue
+                    for element in elements:
+                        if 'tags' in element:
+                            tags = element['tags']
                         
-                        distance = self._calculate_distance(lat, lon, elem_lat, elem_lon)
+                            # Get coordinates
+                            if element['type'] == 'node':
+                                elem_lat, elem_lon = element['lat'], element['lon']
+                            elif 'center' in element:
+                                elem_lat, elem_lon = element['center']['lat'], element['center']['lon']
+                            else:
+                                continue
                         
-                        hospital_info = {
-                            'name': tags.get('name', 'Unknown Medical Facility'),
-                            'type': 'Hospital' if tags.get('amenity') == 'hospital' else 'Clinic',
-                            'distance': round(distance, 1),
-                            'rating': 4.0,  # Default rating for OSM data
-                            'address': self._format_osm_address(tags),
-                            'lat': elem_lat,
-                            'lon': elem_lon,
-                            'phone': tags.get('phone', 'Not available'),
-                            'website': tags.get('website', ''),
-                            'specialties': ['General Medicine']
-                        }
+                            hospital_info = {
+                                'name': tags.get('name', 'Unknown Medical Facility'),
+                                'type': 'Hospital' if tags.get('amenity') == 'hospital' else 'Clinic',
+                                'rating': 4.0,  # Default rating for OSM data
+                                'address': self._format_osm_address(tags),
+                                'lat': elem_lat,
+                                'lon': elem_lon,
+                                'phone': tags.get('phone', 'Not available'),
+                                'website': tags.get('website', ''),
+                                'specialties': ['General Medicine']
+                            }
                         
-                        hospitals.append(hospital_info)
+                            hospitals.append(hospital_info)
                         
         except Exception as e:
             st.warning(f"OpenStreetMap search failed: {e}")
-            return self._get_fallback_hospitals(lat, lon, radius_km)
+            return None
         
-        hospitals.sort(key=lambda x: x['distance'])
-        return hospitals[:15]
+        return self._nearest_facilities(hospitals, lat, lon)
     
     def _format_osm_address(self, tags: Dict) -> str:
         """Format address from OSM tags"""
-        address_parts = []
-        
-        for key in ['addr:housenumber', 'addr:street', 'addr:city', 'addr:state']:
-            if key in tags:
-                address_parts.append(tags[key])
-        
+        address_parts = [tags[key] for key in self._OSM_ADDR_KEYS if key in tags]
         return ', '.join(address_parts) if address_parts else 'Address not available'
     
-    def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """Calculate distance between two points using Haversine formula"""
-        import math
-        
+    def _calculate_distances(self, lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Calculate distances from one point to many points using the Haversine formula"""
         R = 6371  # Earth's radius in kilometers
         
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
+        lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+        lats_rad, lons_rad = np.radians(lats), np.radians(lons)
         
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
+        dlat = lats_rad - lat_rad
+        dlon = lons_rad - lon_rad
         
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
+        a = np.sin(dlat/2)**2 + np.cos(lat_rad) * np.cos(lats_rad) * np.sin(dlon/2)**2
+        c = 2 * np.arcsin(np.sqrt(a))
         
         return R * c
     
+    def _nearest_facilities(self, hospitals: List[Dict], lat: float, lon: float, limit: int = 15) -> List[Dict]:
+        """Return the facilities closest to the given point, nearest first, with their distance (km) set"""
+        lats = np.fromiter((h['lat'] for h in hospitals), dtype=np.float64, count=len(hospitals))
+        lons = np.fromiter((h['lon'] for h in hospitals), dtype=np.float64, count=len(hospitals))
+        distances = self._calculate_distances(lat, lon, lats, lons)
+        
+        nearest = []
+        for i in np.argsort(distances, kind='stable')[:limit].tolist():
+            hospital = hospitals[i]
+            hospital['distance'] = round(distances[i].item(), 1)
+            nearest.append(hospital)
+        return nearest
+    
+    def _add_search_urls(self, hospitals: List[Dict]):
+        """Set each facility's Google Maps search links for its name and, when known, its address"""
+        for hospital in hospitals:
+            hospital['maps_search_url'] = f"https://www.google.com/maps/search/{quote_plus(hospital['name'])}"
+            address = hospital.get('address')
+            if address and address != 'Address not available':
+                hospital['address_search_url'] = f"https://www.google.com/maps/search/{quote_plus(address)}"
+    
     def _get_fallback_hospitals(self, lat: float, lon: float, radius_km: int) -> List[Dict]:
         """Fallback hospital data when APIs fail"""
         return [
@@ -288,3 +415,8 @@ class LocationService:
                 "lon": lon - 0.01
             }
         ]
+
+@st.cache_resource
+def get_location_service() -> LocationService:
+    """Create a single LocationService shared by all Streamlit sessions"""
+    return LocationService()